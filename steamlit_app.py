@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 import gspread
 from google.oauth2.service_account import Credentials
 import streamlit.components.v1 as components
 import re
+import random
+import threading
+import time
+from uuid import uuid4
 
 # =============================
 # App Config / Timezone
@@ -25,11 +30,10 @@ if "private_key" in SERVICE_INFO:
 SHEET_URL = st.secrets["sheets"]["url"]
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
 
-creds = Credentials.from_service_account_info(SERVICE_INFO, scopes=SCOPES)
-client = gspread.authorize(creds)
+_SHEET_ID_RE = re.compile(r"/spreadsheets/d/([a-zA-Z0-9-_]+)")
 
 def extract_sheet_id(url: str):
-    m = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", url)
+    m = _SHEET_ID_RE.search(url)
     return m.group(1) if m else None
 
 sheet_id = extract_sheet_id(SHEET_URL)
@@ -37,28 +41,103 @@ if not sheet_id:
     st.error("Invalid Google Sheet URL in secrets. Expected: https://docs.google.com/spreadsheets/d/<ID>/edit")
     st.stop()
 
-ss = client.open_by_key(sheet_id)
-
-ACTIVE_COLS  = ["Date", "Name", "Group Size", "Transport", "Start Time"]
+ACTIVE_COLS  = ["Date", "Name", "Group Size", "Transport", "Start Time", "ID", "Status"]
 RECORD_COLS  = ["Date", "Name", "Group Size", "Transport", "Start Time", "End Time", "Total Elapsed"]
 
+# Helper sheet that filters Records to today's rows on Google's side, so the
+# History read is O(today) instead of O(all history). TODAY() uses the spreadsheet's
+# timezone, which is set to LOCAL_TZ when the view is created or on ?verify=1.
+TODAY_VIEW_FORMULA = (
+    '=IFERROR(QUERY(Records!A2:G, "select * where A = \'"&TEXT(TODAY(),"yyyy-mm-dd")&"\'", 0), "")'
+)
+
 def col_range(cols: int) -> str:
     return f"A1:{chr(64 + cols)}1"
 
-def get_or_create_ws(name: str, columns: list[str]):
+# Existing sheets are trusted as-is; headers/formula are only rewritten when a
+# sheet is created or the app is opened with ?verify=1. Reads and appends are
+# positional, so Active's newer labels are filled in lazily by read_active_df.
+def get_or_create_ws(ss, name: str, columns: list[str], verify: bool = False):
     try:
         ws = ss.worksheet(name)
     except gspread.WorksheetNotFound:
         ws = ss.add_worksheet(title=name, rows=2000, cols=max(26, len(columns)))
         ws.update("A1", [columns])
         return ws
-    header = ws.row_values(1)
-    if header != columns:
+    if verify and ws.row_values(1) != columns:
         ws.update("A1", [columns])
     return ws
 
-ws_active  = get_or_create_ws("Active", ACTIVE_COLS)
-ws_records = get_or_create_ws("Records", RECORD_COLS)
+def get_or_create_view(ss, name: str, formula: str, verify: bool = False):
+    try:
+        ws = ss.worksheet(name)
+    except gspread.WorksheetNotFound:
+        ws = ss.add_worksheet(title=name, rows=1000, cols=len(RECORD_COLS))
+        verify = True
+    if verify:
+        # TODAY() in the formula must agree with LOCAL_TZ's date
+        if ss.timezone != LOCAL_TZ.key:
+            ss.update_timezone(LOCAL_TZ.key)
+        ws.update("A1", [[formula]], value_input_option="USER_ENTERED")
+    return ws
+
+@st.cache_resource
+def get_client(verify: bool = False):
+    """Authorize once per process and return the (Active, Records, TodayView) worksheet handles."""
+    creds = Credentials.from_service_account_info(SERVICE_INFO, scopes=SCOPES)
+    client = gspread.authorize(creds)
+    ss = client.open_by_key(sheet_id)
+    return (get_or_create_ws(ss, "Active", ACTIVE_COLS, verify),
+            get_or_create_ws(ss, "Records", RECORD_COLS, verify),
+            get_or_create_view(ss, "TodayView", TODAY_VIEW_FORMULA, verify))
+
+ws_active, ws_records, ws_today = get_client(st.query_params.get("verify") == "1")
+
+if ws_today.spreadsheet.timezone != LOCAL_TZ.key:
+    st.warning(f"Spreadsheet timezone is {ws_today.spreadsheet.timezone}, not {LOCAL_TZ.key}; "
+               "History may be empty around midnight. Open the app with ?verify=1 to fix it.")
+
+# Sheets quota errors (429) and transient 5xx are retried with exponential
+# backoff + jitter; writes also pass through a process-wide token bucket.
+RETRY_STATUS = {429, 500, 502, 503}
+
+def with_retry(fn, *args, retry_on: set[int] = RETRY_STATUS, tries: int = 5, **kwargs):
+    for attempt in range(tries):
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code not in retry_on or attempt == tries - 1:
+                raise
+            time.sleep(0.25 * 2 ** attempt + random.random() * 0.25)
+
+class TokenBucket:
+    def __init__(self, rate: int, per: float):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill = rate / per
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available (tokens may go negative to queue)."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.fill)
+            self.stamp = now
+            wait = max(0.0, (1 - self.tokens) / self.fill)
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+
+@st.cache_resource
+def write_bucket() -> TokenBucket:
+    return TokenBucket(rate=60, per=60)   # Sheets: 60 writes/min per user
+
+def write_with_retry(fn, *args, **kwargs):
+    # Appends are not idempotent: a 5xx may have been applied, so only
+    # retry 429s, which Sheets rejects before doing any work.
+    write_bucket().acquire()
+    return with_retry(fn, *args, retry_on={429}, **kwargs)
 
 # =============================
 # Helpers
@@ -66,38 +145,45 @@ ws_records = get_or_create_ws("Records", RECORD_COLS)
 def now_local() -> datetime:
     return datetime.now(LOCAL_TZ)
 
+@st.cache_resource
+def _mmss_table() -> np.ndarray:
+    """Table of "MM:SS" strings for remainders 0..3599, indexed by seconds past the hour."""
+    return np.array([f"{m:02d}:{s:02d}" for m in range(60) for s in range(60)], dtype=object)
+
 def fmt_hms(total_seconds: int) -> str:
-    if total_seconds < 0: total_seconds = 0
-    h = total_seconds // 3600
-    m = (total_seconds % 3600) // 60
-    s = total_seconds % 60
-    return f"{h:02d}:{m:02d}:{s:02d}"
-
-def parse_iso(dt_str: str):
-    """Parse stored local ISO (no timezone) and attach LOCAL_TZ without shifting the clock."""
-    if not dt_str:
-        return None
-    try:
-        dt = datetime.fromisoformat(dt_str)
-    except Exception:
-        try:
-            dt = pd.to_datetime(dt_str).to_pydatetime()
-        except Exception:
-            return None
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=LOCAL_TZ)
-    else:
-        dt = dt.astimezone(LOCAL_TZ)
+    h, rem = divmod(max(total_seconds, 0), 3600)
+    return f"{h:02d}:{_mmss_table()[rem]}"
+
+def fmt_hms_series(total_seconds: pd.Series) -> pd.Series:
+    """Vectorized fmt_hms over an int64 Series of seconds."""
+    secs = total_seconds.clip(lower=0)
+    h, rem = secs // 3600, secs % 3600
+    mmss = pd.Series(_mmss_table()[rem.to_numpy()], index=secs.index)
+    return h.astype(str).str.zfill(2) + ":" + mmss
+
+def parse_iso_series(s: pd.Series) -> pd.Series:
+    """Parse stored ISO strings: offset-aware values convert to LOCAL_TZ, naive ones are taken as local."""
+    s = s.astype(str)
+    aware = s.str.contains(r"(?:Z|[+-]\d\d:?\d\d)$")
+    dt = pd.to_datetime(s.where(aware), format="ISO8601", errors="coerce", utc=True, cache=True).dt.tz_convert(LOCAL_TZ)
+    if not aware.all():
+        naive = pd.to_datetime(s.where(~aware), format="ISO8601", errors="coerce", cache=True)
+        dt = dt.where(aware, naive.dt.tz_localize(LOCAL_TZ, ambiguous="NaT", nonexistent="NaT"))
     return dt
 
+# 12-hour Manual time pickers (5-min steps)
+HOURS_12    = list(range(1, 13))
+MINUTES_5   = list(range(0, 60, 5))
+HOUR_INDEX   = {h: i for i, h in enumerate(HOURS_12)}
+MINUTE_INDEX = {m: i for i, m in enumerate(MINUTES_5)}
+
 def to_24h(hour12: int, minute: int, ampm: str) -> tuple[int, int]:
     h = hour12 % 12
     if ampm.upper() == "PM":
         h += 12
     return h, minute
 
-def default_12h_now():
-    now = now_local()
+def default_12h_now(now: datetime):
     ampm = "PM" if now.hour >= 12 else "AM"
     hour12 = now.hour % 12
     if hour12 == 0:
@@ -105,62 +191,161 @@ def default_12h_now():
     minute = (now.minute // 5) * 5
     return hour12, minute, ampm
 
-def combine_today_local(hour: int, minute: int) -> datetime:
-    base = now_local()
+def combine_today_local(base: datetime, hour: int, minute: int) -> datetime:
     return base.replace(hour=hour, minute=minute, second=0, microsecond=0)
 
-def read_active_df() -> pd.DataFrame:
-    recs = ws_active.get_all_records()
-    df = pd.DataFrame(recs, columns=ACTIVE_COLS) if recs else pd.DataFrame(columns=ACTIVE_COLS)
-    if not df.empty:
-        df["Group Size"] = pd.to_numeric(df["Group Size"], errors="coerce").fillna(1).astype(int)
-        df["Start Time (dt)"] = df["Start Time"].apply(parse_iso)
-    else:
-        df["Start Time (dt)"] = pd.Series(dtype="datetime64[ns, UTC]").astype("object")
+# Raw sheet reads are cached process-wide and cleared by the write helpers,
+# so every session sees a write on its next rerun.
+# One values request per sheet (header row included) instead of get_all_records.
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_active_records() -> list[list]:
+    return list(with_retry(ws_active.get, "A1:G", value_render_option="UNFORMATTED_VALUE"))
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_records() -> list[list]:
+    # TodayView has no header row; it holds only today's Records rows
+    return list(with_retry(ws_today.get, "A1:G", value_render_option="UNFORMATTED_VALUE"))
+
+def _pad_rows(rows: list[list], width: int) -> list[list]:
+    """Right-pad/trim rows to width; the Sheets API omits trailing blank cells."""
+    return [list(r[:width]) + [""] * (width - len(r)) for r in rows]
+
+def _active_frame(rows: list[list]) -> pd.DataFrame:
+    # Index stays 0-based over the data rows, so sheet row == idx + 2
+    df = pd.DataFrame(_pad_rows(rows[1:], len(ACTIVE_COLS)), columns=ACTIVE_COLS)
+    # Rows started before the ID column existed are keyed by name + start instead
+    df["ID"] = df["ID"].astype(str).where(df["ID"].ne(""), df["Name"].astype(str) + "|" + df["Start Time"].astype(str))
     return df
 
+def read_active_df() -> pd.DataFrame:
+    # Ended rounds linger as "done" until the next compaction; blank Status predates the column
+    rows = _fetch_active_records()
+    # Header row comes with the cached read: label added columns (ID/Status) only when short
+    if not rows or len(rows[0]) < len(ACTIVE_COLS):
+        write_with_retry(ws_active.update, "A1", [ACTIVE_COLS])
+        _fetch_active_records.clear()
+        rows = _fetch_active_records()
+    df = _active_frame(rows)
+    df = df[df["Status"].ne("done")]
+    return df.assign(**{
+        "Group Size": pd.to_numeric(df["Group Size"], errors="coerce").fillna(1).astype(int),
+        "Start Time (dt)": parse_iso_series(df["Start Time"]),
+    })
+
 def append_active(name: str, group_size: int, transport: str, start_dt_local: datetime):
-    ws_active.append_row([
+    write_with_retry(ws_active.append_row, [
         start_dt_local.date().isoformat(),   # Date (local)
         name,
         int(group_size),
         transport,
-        start_dt_local.replace(microsecond=0).isoformat()  # local ISO (no tz suffix)
-    ])
+        start_dt_local.isoformat(timespec="seconds"),  # local ISO with UTC offset
+        uuid4().hex,                         # ID
+        "active"                             # Status: flipped to "done" on End
+    ], value_input_option="RAW", table_range="A1:G")   # no server-side type inference
+    _fetch_active_records.clear()
+
+STATUS_COL = ACTIVE_COLS.index("Status")   # 0-based, for GridRange
+
+# Once this many ended rows pile up in Active, the End that crosses the line
+# deletes them all in the same batchUpdate, so Active reads stay O(on course).
+COMPACT_AT = 25
+
+@st.cache_resource
+def active_lock() -> threading.Lock:
+    # Compaction shifts rows up; row-addressed writes must not interleave with it
+    return threading.Lock()
+
+def _delete_rows(sheet_rows: list[int]) -> list[dict]:
+    """deleteDimension requests for 1-based sheet rows, contiguous runs merged, bottom-up."""
+    requests = []
+    for r in sorted(sheet_rows, reverse=True):
+        if requests and requests[-1]["deleteDimension"]["range"]["startIndex"] == r:
+            requests[-1]["deleteDimension"]["range"]["startIndex"] = r - 1
+        else:
+            requests.append({"deleteDimension": {"range": {
+                "sheetId": ws_active.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r,
+            }}})
+    return requests
+
+def _cell(value) -> dict:
+    key = "numberValue" if isinstance(value, (int, float)) else "stringValue"
+    return {"userEnteredValue": {key: value}}
+
+def end_active_round(row_id: str, date_str: str, name: str, group_size: int, transport: str,
+                     start_dt_local: datetime, end_dt_local: datetime) -> bool:
+    """Append to Records and mark the Active row done (compacting if due) in one batchUpdate.
 
-def append_record(date_str: str, name: str, group_size: int, transport: str,
-                  start_dt_local: datetime, end_dt_local: datetime):
+    Returns False without writing if row_id is no longer an active row.
+    """
     total = fmt_hms(int((end_dt_local - start_dt_local).total_seconds()))
-    ws_records.append_row([
+    record = [
         date_str,
         name,
         int(group_size),
         transport,
-        start_dt_local.replace(microsecond=0).isoformat(),
-        end_dt_local.replace(microsecond=0).isoformat(),
+        start_dt_local.isoformat(timespec="seconds"),
+        end_dt_local.isoformat(timespec="seconds"),
         total
-    ])
-
-def delete_active_row(sheet_row: int):
-    ws_active.delete_rows(sheet_row)
-
-def read_records_today_df() -> pd.DataFrame:
-    recs = ws_records.get_all_records()
-    df = pd.DataFrame(recs, columns=RECORD_COLS) if recs else pd.DataFrame(columns=RECORD_COLS)
+    ]
+    with active_lock():
+        # Row positions must be current: other replicas, hand edits in the sheet and
+        # late cache writes can all shift rows, so read Active uncached here.
+        df = _active_frame(with_retry(ws_active.get, "A1:G", value_render_option="UNFORMATTED_VALUE"))
+        done = df["Status"].eq("done")
+        hit = df.index[df["ID"].eq(row_id) & ~done]
+        if hit.empty:
+            return False
+        sheet_row = int(hit[0]) + 2
+        requests = [
+            {"appendCells": {
+                "sheetId": ws_records.id,
+                "rows": [{"values": [_cell(v) for v in record]}],
+                "fields": "userEnteredValue",
+            }},
+            {"updateCells": {
+                "range": {
+                    "sheetId": ws_active.id,
+                    "startRowIndex": sheet_row - 1,
+                    "endRowIndex": sheet_row,
+                    "startColumnIndex": STATUS_COL,
+                    "endColumnIndex": STATUS_COL + 1,
+                },
+                "rows": [{"values": [_cell("done")]}],
+                "fields": "userEnteredValue",
+            }},
+        ]
+        ended_rows = [int(i) + 2 for i in df.index[done]] + [sheet_row]
+        if len(ended_rows) >= COMPACT_AT:
+            requests += _delete_rows(ended_rows)
+        write_with_retry(ws_active.spreadsheet.batch_update, {"requests": requests})
+        _fetch_active_records.clear()
+        _fetch_records.clear()
+    return True
+
+def read_records_today_df(today: date) -> pd.DataFrame:
+    # Drop the IFERROR blank (nothing matched) before framing; pad short rows
+    rows = _pad_rows([r for r in _fetch_records() if r and r[0] != ""], len(RECORD_COLS))
+    df = pd.DataFrame(rows, columns=RECORD_COLS)
+    # Keep only LOCAL_TZ's today in case the spreadsheet timezone has drifted
+    df = df[df["Date"].astype(str).eq(today.isoformat())]
     if df.empty:
         return df
-    df["Group Size"] = pd.to_numeric(df["Group Size"], errors="coerce").fillna(1).astype(int)
-    df["Start Time (dt)"] = df["Start Time"].apply(parse_iso)
-    df["End Time (dt)"] = df["End Time"].apply(parse_iso)
-    today_str = date.today().isoformat()
-    df = df[df["Date"] == today_str].copy()
-    def _elapsed(row):
-        a, b = row["Start Time (dt)"], row["End Time (dt)"]
-        if isinstance(a, datetime) and isinstance(b, datetime):
-            return fmt_hms(int((b - a).total_seconds()))
-        return row.get("Total Elapsed", "")
-    df["Total Elapsed"] = df.apply(_elapsed, axis=1)
-    return df
+    start = parse_iso_series(df["Start Time"])
+    end = parse_iso_series(df["End Time"])
+    secs = (end - start).dt.total_seconds()
+    # Fall back to the stored Total Elapsed where either timestamp is unparseable
+    elapsed = fmt_hms_series(secs.fillna(0).astype("int64")).where(secs.notna(), df["Total Elapsed"])
+    return df.assign(**{
+        "Group Size": pd.to_numeric(df["Group Size"], errors="coerce").fillna(1).astype(int),
+        "Start Time (dt)": start,
+        "End Time (dt)": end,
+        "Total Elapsed": elapsed,
+    })
+
+@st.cache_data(ttl=60, show_spinner=False)
+def records_csv(df: pd.DataFrame) -> bytes:
+    """CSV for the download button, re-encoded only when the History rows change."""
+    return df.to_csv(index=False).encode("utf-8")
 
 # Keep history toggle
 if "show_history" not in st.session_state:
@@ -170,6 +355,10 @@ if "show_history" not in st.session_state:
 # UI
 # =============================
 st.title("⛳ Golf Course Tracker (Shared)")
+
+# One clock read per full rerun, shared by the Add pickers, Start handlers and History
+run_now = now_local()
+
 st.caption(f"Times shown in {LOCAL_TZ.key}")
 
 # -----------------------------
@@ -186,13 +375,13 @@ with col_group:
 transport = st.radio("Transport", ["Walking", "Cart"], horizontal=True)
 
 mode_add = st.radio("Start mode", ["Now", "Manual time"], horizontal=True)
-h12_def, m_def, ampm_def = default_12h_now()
+h12_def, m_def, ampm_def = default_12h_now(run_now)
 if mode_add == "Manual time":
     c1, c2, c3 = st.columns([1,1,1])
     with c1:
-        start_hour12 = st.selectbox("Hour", list(range(1,13)), index=list(range(1,13)).index(h12_def), key="start_h12")
+        start_hour12 = st.selectbox("Hour", HOURS_12, index=HOUR_INDEX[h12_def], key="start_h12")
     with c2:
-        start_minute = st.selectbox("Minute", list(range(0,60,5)), index=list(range(0,60,5)).index(m_def), key="start_min5")
+        start_minute = st.selectbox("Minute", MINUTES_5, index=MINUTE_INDEX[m_def], key="start_min5")
     with c3:
         start_ampm = st.selectbox("AM / PM", ["AM","PM"], index=(0 if ampm_def=="AM" else 1), key="start_ampm")
 
@@ -201,7 +390,7 @@ start_now_clicked = b_now.button("▶️ Start Round (Now)")
 start_manual_clicked = b_manual.button("🕒 Start Round (Manual)")
 
 if start_now_clicked and name.strip():
-    start_dt_local = now_local()
+    start_dt_local = run_now
     append_active(name.strip(), int(group_size), transport, start_dt_local)
     st.success(f"Started {name} at {start_dt_local.strftime('%I:%M %p')} ({transport}).")
     st.rerun()
@@ -211,7 +400,7 @@ if start_manual_clicked and name.strip():
         st.warning("Choose ‘Manual time’ to set hour/minute first.")
     else:
         hh24, mm = to_24h(int(start_hour12), int(start_minute), str(start_ampm))
-        start_dt_local = combine_today_local(hh24, mm)
+        start_dt_local = combine_today_local(run_now, hh24, mm)
         append_active(name.strip(), int(group_size), transport, start_dt_local)
         st.success(f"Started {name} at {start_dt_local.strftime('%I:%M %p')} ({transport}).")
         st.rerun()
@@ -219,30 +408,7 @@ if start_manual_clicked and name.strip():
 # -----------------------------
 # Current Golfers (no-flash live timers; Date hidden; white text)
 # -----------------------------
-st.subheader("Current Golfers on Course")
-
-df_active_display = read_active_df()
-if df_active_display.empty:
-    st.info("No golfers are currently on the course.")
-else:
-    # Build rows with data-startiso parsed by the browser as local time
-    rows_html = []
-    for _, r in df_active_display.iterrows():
-        st_dt = r["Start Time (dt)"]
-        start_label = (st_dt.strftime('%I:%M %p') if isinstance(st_dt, datetime) else r["Start Time"])
-        start_iso = (st_dt.replace(microsecond=0).isoformat() if isinstance(st_dt, datetime) else r["Start Time"])
-        rows_html.append(f"""
-          <tr>
-            <td>{r['Name']}</td>
-            <td class="center">{r['Group Size']}</td>
-            <td class="center">{r['Transport']}</td>
-            <td class="center">{start_label}</td>
-            <td class="elapsed" data-startiso="{start_iso}">--:--:--</td>
-          </tr>
-        """)
-    rows_html_str = "\n".join(rows_html)
-
-    html = """
+LIVE_TABLE_HTML = """
 <style>
   .golf-wrap{
     overflow:auto; border:1px solid #333; border-radius:12px; padding:8px;
@@ -281,83 +447,129 @@ else:
 
 <script>
   function pad(n){ return n < 10 ? ('0' + n) : n; }
-  function fmt(s){ var h=Math.floor(s/3600), m=Math.floor((s%3600)/60), x=s%60; return pad(h)+':'+pad(m)+':'+pad(x); }
+  function fmt(s){ var h=(s/3600)|0, m=((s%3600)/60)|0, x=s%60; return pad(h)+':'+pad(m)+':'+pad(x); }
+  // Query and parse once; each tick only does arithmetic + textContent
+  var cells = Array.prototype.map.call(document.querySelectorAll('.elapsed'), function(td){
+    return { td: td, start: Date.parse(td.dataset.startiso) };   // parsed as local by the browser
+  });
   function tick(){
-    document.querySelectorAll('.elapsed').forEach(function(td){
-      var iso = td.dataset.startiso;
-      var startMs = Date.parse(iso);   // parsed as local by the browser
-      var nowMs = Date.now();
-      if (!isNaN(startMs)) {
-        var secs = Math.max(0, Math.floor((nowMs - startMs)/1000));
-        td.textContent = fmt(secs);
-      } else {
-        td.textContent = "--:--:--";
-      }
-    });
+    var nowMs = Date.now();
+    for (var i = 0; i < cells.length; i++) {
+      var c = cells[i];
+      c.td.textContent = isNaN(c.start) ? "--:--:--" : fmt(Math.max(0, ((nowMs - c.start)/1000)|0));
+    }
+  }
+  // rAF is paused by the browser on hidden tabs; repaint at most once a second
+  var last = -Infinity;
+  function loop(ts){
+    if (ts - last >= 1000) { last = ts; tick(); }
+    requestAnimationFrame(loop);
   }
   tick();
-  setInterval(tick, 1000);
+  requestAnimationFrame(loop);
 </script>
 """
-    html = html.replace("{{ROWS}}", rows_html_str)
-    components.html(html, height=min(420, 140 + 40*len(rows_html)))
 
-    if st.button("🔃 Refresh data"):
-        st.rerun()
+# Fragment: "Refresh data" reruns only the live table and End Round, not the
+# whole page; both are fed from this single Active read.
+@st.fragment
+def live_panel():
+    st.subheader("Current Golfers on Course")
+
+    df_active = read_active_df()   # cached; refetched only after Refresh/TTL
+    if df_active.empty:
+        st.info("No golfers are currently on the course.")
+    else:
+        # Build rows with data-startiso parsed by the browser as local time
+        # zip over columns instead of iterrows() to skip per-row Series boxing
+        rows_html = []
+        cols = ["Name", "Group Size", "Transport", "Start Time", "Start Time (dt)"]
+        for nm, gs, tr, st_str, st_dt in zip(*(df_active[c] for c in cols)):
+            is_dt = pd.notna(st_dt)
+            start_label = st_dt.strftime('%I:%M %p') if is_dt else st_str
+            start_iso = st_dt.isoformat(timespec='seconds') if is_dt else st_str
+            rows_html.append(f"""
+              <tr>
+                <td>{nm}</td>
+                <td class="center">{gs}</td>
+                <td class="center">{tr}</td>
+                <td class="center">{start_label}</td>
+                <td class="elapsed" data-startiso="{start_iso}">--:--:--</td>
+              </tr>
+            """)
+        rows_html_str = "\n".join(rows_html)
+
+        html = LIVE_TABLE_HTML.replace("{{ROWS}}", rows_html_str)
+        components.html(html, height=min(420, 140 + 40*len(rows_html)))
+
+        if st.button("🔃 Refresh data"):
+            _fetch_active_records.clear()
+            st.rerun(scope="fragment")
+
+    # Fragment reruns skip the module body, so take a fresh clock here
+    end_round_panel(df_active, now_local())
 
 # -----------------------------
 # End Round (Now or Manual)
 # -----------------------------
-st.subheader("End Round")
-df_active_for_end = read_active_df()
-if not df_active_for_end.empty:
-    options = []
-    for idx, r in df_active_for_end.iterrows():
-        sheet_row = idx + 2
-        st_label = r["Start Time (dt)"].strftime("%I:%M %p") if isinstance(r["Start Time (dt)"], datetime) else r["Start Time"]
-        label = f"{r['Name']} · {r['Transport']} · started {st_label} (row {sheet_row})"
-        options.append((label, sheet_row))
-    choice = st.selectbox("Select golfer to end", options, format_func=lambda x: x[0])
-
-    mode_end = st.radio("End mode", ["Now", "Manual time"], horizontal=True, key="end_mode")
-
-    # Manual end pickers (defaults)
-    eh12_def, em_def, eampm_def = default_12h_now()
-    if mode_end == "Manual time":
-        e1, e2, e3 = st.columns([1,1,1])
-        with e1:
-            end_hour12 = st.selectbox("Hour", list(range(1,13)), index=list(range(1,13)).index(eh12_def), key="end_h12")
-        with e2:
-            end_minute = st.selectbox("Minute", list(range(0,60,5)), index=list(range(0,60,5)).index(em_def), key="end_min5")
-        with e3:
-            end_ampm = st.selectbox("AM / PM", ["AM","PM"], index=(0 if eampm_def=="AM" else 1), key="end_ampm")
-
-    end_now_clicked = st.button("⏹ End Round (Now)")
-    end_manual_clicked = st.button("🕒 End Round (Manual)")
-
-    if end_now_clicked or end_manual_clicked:
-        _, sheet_row = choice
-        row_vals = ws_active.row_values(sheet_row)
-        # Expected: [Date, Name, Group Size, Transport, Start Time]
-        date_str, name_val, group_sz, transport_val, start_str = row_vals
-        start_dt_local = parse_iso(start_str) or now_local()
-
-        if end_manual_clicked:
-            if mode_end != "Manual time":
-                st.warning("Choose ‘Manual time’ to set hour/minute first.")
-                st.stop()
-            h24, mm = to_24h(int(end_hour12), int(end_minute), str(end_ampm))
-            end_dt_local = combine_today_local(h24, mm)
-        else:
-            end_dt_local = now_local()
-
-        append_record(date_str, name_val, int(group_sz or 1), transport_val, start_dt_local, end_dt_local)
-        delete_active_row(sheet_row)
+def end_round_panel(df_active: pd.DataFrame, now: datetime):
+    st.subheader("End Round")
+    if not df_active.empty:
+        # Labels are built column-wise; no per-row Series from iterrows()
+        st_labels = df_active["Start Time (dt)"].dt.strftime("%I:%M %p").fillna(df_active["Start Time"].astype(str))
+        labels = (df_active["Name"].astype(str) + " · " + df_active["Transport"].astype(str)
+                  + " · started " + st_labels)
+        label_of = dict(zip(df_active["ID"], labels))
+        # A form batches the widgets below into one rerun on submit, instead of a
+        # rerun (and Sheets read) per selectbox/radio change.
+        with st.form("end_form"):
+            # Options are row IDs under a stable key, with no default: if the list
+            # changes before submit the widget resets to None, never to another golfer.
+            chosen_id = st.selectbox("Select golfer to end", list(label_of), index=None,
+                                     format_func=label_of.get, placeholder="Choose a golfer",
+                                     key="end_choice")
+            mode_end = st.radio("End mode", ["Now", "Manual time"], horizontal=True, key="end_mode")
+
+            # Manual end pickers (used when End mode is ‘Manual time’)
+            eh12_def, em_def, eampm_def = default_12h_now(now)
+            e1, e2, e3 = st.columns([1,1,1])
+            with e1:
+                end_hour12 = st.selectbox("Hour", HOURS_12, index=HOUR_INDEX[eh12_def], key="end_h12")
+            with e2:
+                end_minute = st.selectbox("Minute", MINUTES_5, index=MINUTE_INDEX[em_def], key="end_min5")
+            with e3:
+                end_ampm = st.selectbox("AM / PM", ["AM","PM"], index=(0 if eampm_def=="AM" else 1), key="end_ampm")
+
+            end_submitted = st.form_submit_button("⏹ End Round")
+
+        # The form may post minutes after it was drawn: re-check the chosen ID
+        # against this rerun's Active read before writing anything.
+        hit = df_active[df_active["ID"].eq(chosen_id)]
+        if end_submitted and hit.empty:
+            st.warning("Choose a golfer to end (the list may have changed since this form was shown).")
+        elif end_submitted:
+            # Row values come from the cached read above -- no extra Sheets round-trip
+            row = hit.iloc[0]
+            start_dt_local = row["Start Time (dt)"]
+            if pd.isna(start_dt_local):
+                start_dt_local = now
+
+            if mode_end == "Manual time":
+                h24, mm = to_24h(int(end_hour12), int(end_minute), str(end_ampm))
+                end_dt_local = combine_today_local(now, h24, mm)
+            else:
+                end_dt_local = now
+
+            if end_active_round(chosen_id, row["Date"], row["Name"], int(row["Group Size"]), row["Transport"],
+                                start_dt_local, end_dt_local):
+                st.success(f"Ended {row['Name']} at {end_dt_local.strftime('%I:%M %p')} · saved to Records.")
+                st.rerun()
+            else:
+                st.warning(f"{row['Name']} was already ended elsewhere.")
+    else:
+        st.caption("No active golfers to end.")
 
-        st.success(f"Ended {name_val} at {end_dt_local.strftime('%I:%M %p')} · saved to Records.")
-        st.rerun()
-else:
-    st.caption("No active golfers to end.")
+live_panel()
 
 # -----------------------------
 # Today's History (button at bottom)
@@ -369,8 +581,8 @@ with colA:
         st.session_state.show_history = not st.session_state.show_history
 
 if st.session_state.show_history:
-    st.subheader(f"History — {date.today().isoformat()}")
-    today_df = read_records_today_df()
+    st.subheader(f"History — {run_now.date().isoformat()}")
+    today_df = read_records_today_df(run_now.date())
     if today_df.empty:
         st.info("No finished rounds for today yet.")
     else:
@@ -381,11 +593,11 @@ if st.session_state.show_history:
         total_players = int(today_df["Group Size"].sum())
         st.caption(f"Rounds: {total_rounds} • Players: {total_players}")
 
-        csv_bytes = today_df[show_cols].to_csv(index=False).encode("utf-8")
+        csv_bytes = records_csv(today_df[show_cols])
         st.download_button(
             "⬇️ Download Today’s CSV",
             csv_bytes,
-            file_name=f"golf_records_{date.today().isoformat()}.csv",
+            file_name=f"golf_records_{run_now.date().isoformat()}.csv",
             mime="text/csv"
         )
 